@@ -5,13 +5,28 @@ import plotly.express as px
 import pandas as pd
 import numpy as np
 from collections import Counter
+from nowcast import Nowcast, PollSource, POLLS_PATH, load_nowcast
+from sampling import METHODS, draw_normals, estimate, shifted_normal, weighted_quantile
 
 
 app = dash.Dash(__name__)
 
 
-def run_simulation(n_simulations):
-    results = []
+# Prior swing state margins, updated by incoming polls
+swing_state_margins = {
+    'Pennsylvania': ('normal', 1.2, 0.8), 
+    'Georgia': ('normal', 0.8, 0.7),
+    'Michigan': ('normal', 1.5, 0.9)
+}
+
+nowcast = Nowcast.from_margins(swing_state_margins)
+poll_source = PollSource(POLLS_PATH)
+load_nowcast(nowcast, poll_source)
+
+
+# momentum_shift moves the national momentum draws (in points) when method is 'importance',
+# which reaches landslide scenarios far more often. The 'weight' column undoes the shift.
+def run_simulation(n_simulations, method="plain", momentum_shift=0.0):
     
     
     base_ranges = {
@@ -20,53 +35,55 @@ def run_simulation(n_simulations):
     }
     
     
-    swing_state_margins = {
-        'Pennsylvania': ('normal', 1.2, 0.8), 
-        'Georgia': ('normal', 0.8, 0.7),
-        'Michigan': ('normal', 1.5, 0.9)
+    state_margins = nowcast.margin_table()
+    
+    # All simulations are drawn at once, one row of normal draws per simulation.
+    # Column 0 is national momentum, so stratified sampling stratifies on it.
+    z, groups = draw_normals(n_simulations, 3 + 3 * len(state_margins), method)
+    weights = np.ones(n_simulations)
+    if method == "importance":
+        z[:, 0], weights = shifted_normal(z[:, 0], momentum_shift / 0.7)
+    
+    momentum = 0.7 * z[:, 0]
+    
+    
+    kamala_pct = 50 + momentum + 1.5 * z[:, 1]
+    turnout = 155000000 + 2000000 * z[:, 2]
+    
+    kamala_votes = ((kamala_pct / 100) * turnout).astype(np.int64)
+    trump_votes = (turnout - kamala_votes).astype(np.int64)
+    
+    
+    swing_states = {}
+    state_turnouts = {
+        'Pennsylvania': 6900000,
+        'Georgia': 5000000,
+        'Michigan': 5700000
     }
     
-    for _ in range(n_simulations):
-        
-        momentum = np.random.normal(0, 0.7)  
-        
+    for i, (state, (dist, mean, std)) in enumerate(state_margins.items()):
+        state_z = z[:, 3 + 3 * i:6 + 3 * i]
+        state_momentum = momentum + 0.5 * state_z[:, 0]
+        state_margin = mean + state_momentum + std * state_z[:, 1]
+        state_turnout = state_turnouts[state] * (1 + 0.03 * state_z[:, 2])
         
-        kamala_pct = np.random.normal(50 + momentum, 1.5)  
-        turnout = np.random.normal(155000000, 2000000)     
-        
-        kamala_votes = int((kamala_pct / 100) * turnout)
-        trump_votes = int(turnout - kamala_votes)
-        
-        
-        swing_states = {}
-        state_turnouts = {
-            'Pennsylvania': 6900000,
-            'Georgia': 5000000,
-            'Michigan': 5700000
-        }
-        
-        for state, (dist, mean, std) in swing_state_margins.items():
-            state_momentum = momentum + np.random.normal(0, 0.5)  
-            state_margin = np.random.normal(mean + state_momentum, std)
-            state_turnout = np.random.normal(state_turnouts[state], state_turnouts[state] * 0.03)
-            
-            kamala_state = int(state_turnout * (50 + state_margin) / 100)
-            trump_state = int(state_turnout - kamala_state)
-            swing_states[state] = (kamala_state, trump_state)
-        
-        results.append({
-            'simulation': _,
-            'kamala_total': kamala_votes,
-            'trump_total': trump_votes,
-            'margin': kamala_votes - trump_votes,
-            'margin_pct': (kamala_votes - trump_votes) / turnout * 100,
-            'PA_margin': swing_states['Pennsylvania'][0] - swing_states['Pennsylvania'][1],
-            'GA_margin': swing_states['Georgia'][0] - swing_states['Georgia'][1],
-            'MI_margin': swing_states['Michigan'][0] - swing_states['Michigan'][1],
-            'national_momentum': momentum
-        })
-    
-    return pd.DataFrame(results)
+        kamala_state = (state_turnout * (50 + state_margin) / 100).astype(np.int64)
+        trump_state = (state_turnout - kamala_state).astype(np.int64)
+        swing_states[state] = (kamala_state, trump_state)
+    
+    return pd.DataFrame({
+        'simulation': np.arange(n_simulations),
+        'kamala_total': kamala_votes,
+        'trump_total': trump_votes,
+        'margin': kamala_votes - trump_votes,
+        'margin_pct': (kamala_votes - trump_votes) / turnout * 100,
+        'PA_margin': swing_states['Pennsylvania'][0] - swing_states['Pennsylvania'][1],
+        'GA_margin': swing_states['Georgia'][0] - swing_states['Georgia'][1],
+        'MI_margin': swing_states['Michigan'][0] - swing_states['Michigan'][1],
+        'national_momentum': momentum,
+        'weight': weights,
+        'sample_group': groups
+    })
 
 
 app.layout = html.Div([
@@ -83,6 +100,23 @@ app.layout = html.Div([
             value=1000,
             marks={i: str(i) for i in range(0, 10001, 2000)}
         ),
+        html.Label("Sampling Method:"),
+        dcc.Dropdown(
+            id='sampling-method',
+            options=[{'label': m.title(), 'value': m} for m in METHODS],
+            value='plain',
+            clearable=False
+        ),
+        # Momentum has an sd of 0.7 points, larger shifts leave too few useful draws
+        html.Label("Importance Sampling Momentum Shift (points):"),
+        dcc.Slider(
+            id='momentum-shift',
+            min=-0.7,
+            max=0.7,
+            step=0.05,
+            value=0,
+            marks={-0.7: '-0.7', 0: '0', 0.7: '0.7'}
+        ),
         html.Button('Run Simulation', id='run-button', n_clicks=0, 
                    className="btn btn-primary my-3")
     ], className="container mx-auto p-4 border rounded"),
@@ -92,7 +126,8 @@ app.layout = html.Div([
         html.Div([
             html.Div([
                 html.H3(id='win-rate', className="text-4xl font-bold"),
-                html.P("Kamala Win Probability")
+                html.P("Kamala Win Probability"),
+                html.P(id='win-rate-precision', className="text-gray-600")
             ], className="bg-white p-4 rounded shadow"),
             
             html.Div([
@@ -130,14 +165,18 @@ app.layout = html.Div([
     Output('simulation-store', 'data'),
     Input('run-button', 'n_clicks'),
     State('simulation-slider', 'value'),
+    State('sampling-method', 'value'),
+    State('momentum-shift', 'value'),
     prevent_initial_call=True
 )
-def update_simulation(n_clicks, n_simulations):
-    df = run_simulation(n_simulations)
+def update_simulation(n_clicks, n_simulations, method, momentum_shift):
+    load_nowcast(nowcast, poll_source)
+    df = run_simulation(n_simulations, method, momentum_shift)
     return df.to_dict('records')
 
 @app.callback(
     [Output('win-rate', 'children'),
+     Output('win-rate-precision', 'children'),
      Output('avg-margin', 'children'),
      Output('margin-95', 'children'),
      Output('margin-histogram', 'figure'),
@@ -147,19 +186,25 @@ def update_simulation(n_clicks, n_simulations):
 )
 def update_graphs(data):
     if not data:
-        return "0%", "0", "0", {}, {}, {}
+        return "0%", "", "0", "0", {}, {}, {}
     
     df = pd.DataFrame(data)
+    weights = df['weight']
     
     
-    win_rate = f"{(sum(df['margin'] > 0) / len(df) * 100):.1f}%"
-    avg_margin = f"{df['margin_pct'].mean():+.1f}%"
-    ci_95 = f"{df['margin_pct'].quantile(0.025):+.1f}% to {df['margin_pct'].quantile(0.975):+.1f}%"
+    win = estimate(df['margin'] > 0, df['sample_group'], weights)
+    win_rate = f"{win['mean'] * 100:.1f}%"
+    ess = "n/a" if win['ess'] is None else f"~{win['ess']:,.0f}"
+    win_precision = f"± {win['std_error'] * 100:.2f}% (effective sample size {ess})"
+    avg_margin = f"{np.average(df['margin_pct'], weights=weights):+.1f}%"
+    ci_95 = f"{weighted_quantile(df['margin_pct'], 0.025, weights):+.1f}% to {weighted_quantile(df['margin_pct'], 0.975, weights):+.1f}%"
     
     
     hist_fig = go.Figure()
     hist_fig.add_trace(go.Histogram(
         x=df['margin_pct'],
+        y=weights,
+        histfunc='sum',
         nbinsx=50,
         marker_color='rgb(100, 100, 200)',
         opacity=0.7
@@ -184,14 +229,14 @@ def update_graphs(data):
     swing_states_data = pd.DataFrame({
         'State': ['Pennsylvania', 'Georgia', 'Michigan'],
         'Win Probability': [
-            (df['PA_margin'] > 0).mean() * 100,
-            (df['GA_margin'] > 0).mean() * 100,
-            (df['MI_margin'] > 0).mean() * 100
+            np.average(df['PA_margin'] > 0, weights=weights) * 100,
+            np.average(df['GA_margin'] > 0, weights=weights) * 100,
+            np.average(df['MI_margin'] > 0, weights=weights) * 100
         ],
         'Avg Margin': [
-            df['PA_margin'].mean() / 69000,  # Converting to percentage
-            df['GA_margin'].mean() / 50000,
-            df['MI_margin'].mean() / 57000
+            np.average(df['PA_margin'], weights=weights) / 69000,  # Converting to percentage
+            np.average(df['GA_margin'], weights=weights) / 50000,
+            np.average(df['MI_margin'], weights=weights) / 57000
         ]
     })
     
@@ -220,7 +265,7 @@ def update_graphs(data):
         template="plotly_white"
     )
     
-    return win_rate, avg_margin, ci_95, hist_fig, swing_fig, prob_fig
+    return win_rate, win_precision, avg_margin, ci_95, hist_fig, swing_fig, prob_fig
 
 if __name__ == '__main__':
     app.run_server(debug=True)
\ No newline at end of file
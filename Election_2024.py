@@ -3,6 +3,8 @@ import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output
 import plotly.graph_objs as go
+from nowcast import Nowcast, PollSource, POLLS_PATH, load_nowcast
+from sampling import METHODS, draw_uniforms, estimate, tilted_bernoulli
 
 # Initialize Dash app
 app = dash.Dash(__name__)
@@ -21,20 +23,56 @@ states = [
 total_electoral_votes = sum(state["votes"] for state in states)
 votes_to_win = total_electoral_votes // 2 + 1
 n_simulations = 80000
+# Either candidate reaching this many votes counts as a landslide
+landslide_votes = int(total_electoral_votes * 0.75)
+
+# Fold any available polls into the hard-coded probabilities above
+nowcast = Nowcast.from_probabilities(states)
+poll_source = PollSource(POLLS_PATH)
+load_nowcast(nowcast, poll_source)
+for state in states:
+    state["prob_harris"] = round(nowcast.prob(state["name"]), 2)
 
 # Define layout
 app.layout = html.Div([
     html.H1("Election Outcome Simulation Dashboard"),
     
-    # Swing state probability sliders
+    # Swing state probability sliders, locked to the poll nowcast while following polls
+    dcc.Checklist(
+        id="follow-polls",
+        options=[{"label": "Follow polls for swing states", "value": "follow"}],
+        value=["follow"],
+    ),
+    dcc.Interval(id="poll-refresh", interval=60*1000, n_intervals=0),
+    html.Div([
+        html.Div([
+            html.Label(f"{state['name']} Probability for Kamala Harris:"),
+            dcc.Slider(
+                id=f"slider-{state['name']}",
+                min=0, max=1, step=0.01,
+                value=state["prob_harris"],
+                marks={0: '0%', 0.5: '50%', 1: '100%'},
+                disabled=True,
+            )
+        ]) for state in states if state["swing_state"]
+    ]),
+    
+    # Sampling strategy, the tilt only applies to importance sampling
     html.Div([
-        html.Label(f"{state['name']} Probability for Kamala Harris:"),
+        html.Label("Sampling Method:"),
+        dcc.Dropdown(
+            id="sampling-method",
+            options=[{"label": m.title(), "value": m} for m in METHODS],
+            value="plain",
+            clearable=False,
+        ),
+        html.Label("Importance Tilt (log-odds toward Kamala Harris):"),
         dcc.Slider(
-            id=f"slider-{state['name']}",
-            min=0, max=1, step=0.01,
-            value=state["prob_harris"],
-            marks={0: '0%', 0.5: '50%', 1: '100%'},
-        ) for state in states if state["swing_state"]
+            id="importance-tilt",
+            min=-2, max=2, step=0.1,
+            value=0,
+            marks={-2: '-2', 0: '0', 2: '2'},
+        )
     ]),
     
     # Run Simulation Button
@@ -50,51 +88,88 @@ app.layout = html.Div([
     dcc.Graph(id="market-reaction-pie-chart")
 ])
 
+# Simulate many scenarios at once, one row of state probabilities per scenario.
+# All scenarios share the same draws. Returns Harris's electoral votes, swing states won
+# and sample weights, each shaped (scenarios, simulations), plus the draw groups for estimate().
+def simulate_electoral_votes(probabilities, n_simulations, method="plain", tilt=0.0):
+    probabilities = np.atleast_2d(np.asarray(probabilities, dtype=float))
+    votes = np.array([state["votes"] for state in states])
+    swing = np.array([state["swing_state"] for state in states])
+
+    # Stratified sampling stratifies on the swing state with the most electoral votes
+    strata_dim = max((i for i, state in enumerate(states) if state["swing_state"]), key=lambda i: states[i]["votes"])
+    u, groups = draw_uniforms(n_simulations, len(states), method, strata_dim)
+    if method == "importance":
+        harris_won, weights = tilted_bernoulli(u, probabilities[:, None, :], tilt)
+    else:
+        harris_won = u < probabilities[:, None, :]
+        weights = np.ones(harris_won.shape[:2])
+    harris_votes = harris_won @ votes
+    swing_states_won = harris_won[:, :, swing].sum(axis=2)
+    return harris_votes, swing_states_won, weights, groups
+
 # Helper function to run simulations
-def run_simulation(probabilities):
-    harris_wins = 0
-    trump_wins = 0
-    market_reaction = {"Kamala Harris": {"positive": 0, "negative": 0}, "Donald Trump": {"positive": 0, "negative": 0}}
-
-    for _ in range(n_simulations):
-        harris_votes = 0
-        trump_votes = 0
-        swing_states_won = 0
-
-        for i, state in enumerate(states):
-            prob_harris = probabilities[i]
-            if np.random.rand() < prob_harris:
-                harris_votes += state["votes"]
-                if state["swing_state"]:
-                    swing_states_won += 1
-            else:
-                trump_votes += state["votes"]
-
-        if harris_votes >= votes_to_win:
-            harris_wins += 1
-            if swing_states_won >= len([s for s in states if s["swing_state"]]) // 2:
-                market_reaction["Kamala Harris"]["positive"] += 1
-            else:
-                market_reaction["Kamala Harris"]["negative"] += 1
-        else:
-            trump_wins += 1
-            if swing_states_won < len([s for s in states if s["swing_state"]]) // 2:
-                market_reaction["Donald Trump"]["positive"] += 1
-            else:
-                market_reaction["Donald Trump"]["negative"] += 1
-
-    return harris_wins, trump_wins, market_reaction
+# Counts are weighted, so with importance sampling they are expected counts rather than whole numbers
+def run_simulation(probabilities, method="plain", tilt=0.0):
+    harris_votes, swing_states_won, weights, groups = simulate_electoral_votes(probabilities, n_simulations, method, tilt)
+    harris_votes, swing_states_won, weights = harris_votes[0], swing_states_won[0], weights[0]
+    half_swing = len([s for s in states if s["swing_state"]]) // 2
+
+    harris_won = harris_votes >= votes_to_win
+    harris_wins = float(weights[harris_won].sum())
+    trump_wins = float(weights[~harris_won].sum())
+    market_reaction = {
+        "Kamala Harris": {
+            "positive": float(weights[harris_won & (swing_states_won >= half_swing)].sum()),
+            "negative": float(weights[harris_won & (swing_states_won < half_swing)].sum()),
+        },
+        "Donald Trump": {
+            "positive": float(weights[~harris_won & (swing_states_won < half_swing)].sum()),
+            "negative": float(weights[~harris_won & (swing_states_won >= half_swing)].sum()),
+        },
+    }
+
+    estimates = {
+        "Kamala Harris wins": estimate(harris_won, groups, weights),
+        "Landslide": estimate((harris_votes >= landslide_votes) | (total_electoral_votes - harris_votes >= landslide_votes), groups, weights),
+    }
+    # A tie can only happen when the total is even, which this map's 189 votes isn't
+    if total_electoral_votes % 2 == 0:
+        estimates["Electoral tie"] = estimate(2 * harris_votes == total_electoral_votes, groups, weights)
+
+    return harris_wins, trump_wins, market_reaction, estimates
+
+# While following polls, keep the swing state sliders showing the nowcast
+@app.callback(
+    [Output(f"slider-{state['name']}", "value") for state in states if state["swing_state"]]
+    + [Output(f"slider-{state['name']}", "disabled") for state in states if state["swing_state"]],
+    Input("follow-polls", "value"),
+    Input("poll-refresh", "n_intervals"),
+)
+def sync_sliders(follow, n):
+    swing_states = [state for state in states if state["swing_state"]]
+    if "follow" not in follow:
+        return [dash.no_update] * len(swing_states) + [False] * len(swing_states)
+    load_nowcast(nowcast, poll_source)
+    return [round(nowcast.prob(state["name"]), 2) for state in swing_states] + [True] * len(swing_states)
 
 # Callback to update results based on slider values
 @app.callback(
     Output("results", "children"),
     Output("outcome-pie-chart", "figure"),
     Output("market-reaction-pie-chart", "figure"),
-    [Input(f"slider-{state['name']}", "value") for state in states if state["swing_state"]] + [Input("run-simulation-btn", "n_clicks")]
+    [Input(f"slider-{state['name']}", "value") for state in states if state["swing_state"]]
+    + [Input("follow-polls", "value"), Input("sampling-method", "value"), Input("importance-tilt", "value"),
+       Input("run-simulation-btn", "n_clicks")]
 )
 def update_simulation(*inputs):
-    probabilities = list(inputs[:-1]) + [state["prob_harris"] for state in states if not state["swing_state"]]
-    harris_wins, trump_wins, market_reaction = run_simulation(probabilities)
+    follow, method, tilt = inputs[-4], inputs[-3], inputs[-2]
+
+    # Non-swing states always follow the polls, swing states follow the sliders unless following polls
+    load_nowcast(nowcast, poll_source)
+    swing_probs = {} if "follow" in follow else dict(zip([s["name"] for s in states if s["swing_state"]], inputs[:-4]))
+    probabilities = [swing_probs.get(state["name"], nowcast.prob(state["name"])) for state in states]
+    harris_wins, trump_wins, market_reaction, estimates = run_simulation(probabilities, method, tilt)
 
     # Calculate winning probabilities
     prob_harris = harris_wins / n_simulations
@@ -102,6 +177,9 @@ def update_simulation(*inputs):
 
     # Update result text
     results_text = f"Probability Kamala Harris wins: {prob_harris:.2%}<br>Probability Donald Trump wins: {prob_trump:.2%}"
+    for outcome, est in estimates.items():
+        ess = "n/a" if est["ess"] is None else f"~{est['ess']:,.0f}"
+        results_text += f"<br>{outcome}: {est['mean']:.3%} ± {est['std_error']:.3%} (effective sample size {ess})"
 
     # Outcome Pie Chart
     outcome_fig = go.Figure(data=[go.Pie(labels=["Kamala Harris Wins", "Donald Trump Wins"], 
@@ -5,6 +5,7 @@ import plotly.express as px
 import pandas as pd
 import numpy as np
 from joblib import load
+from prediction_model import predict_outcome
 
 # Initialize Dash app
 app = dash.Dash(
@@ -192,12 +193,7 @@ def update_predictions(n_clicks, unemployment, gdp, approval, ballot):
     if n_clicks is None:
         raise dash.exceptions.PreventUpdate
     
-    # Calculate win probability (simplified example)
-    win_prob = 50 + (approval - 50) * 0.5 + gdp * 2 - (unemployment - 5) * 3 + ballot * 2
-    win_prob = max(min(win_prob, 99), 1)
-    
-    # Calculate predicted margin
-    margin = (win_prob - 50) / 5
+    win_prob, margin = predict_outcome(unemployment, gdp, approval, ballot)
     
     # Create distribution plot
     margin_dist = go.Figure()
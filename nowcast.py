@@ -0,0 +1,283 @@
+import csv
+import datetime
+import io
+import json
+import math
+import os
+import queue
+import threading
+import time
+from statistics import NormalDist
+
+# Polls are read from this file if it exists (CSV or JSON lines)
+POLLS_PATH = os.environ.get("ELECTION_POLLS", "polls.csv")
+
+# Uncertainty settings, all in points of Harris two-party share above 50%
+ELECTION_DAY_SD = 2.0      # error left over on election day even with perfect polling
+DRIFT_PER_DAY = 0.05       # variance added to a state's estimate per day without polls
+MIN_POLL_VARIANCE = 1.0    # floor for non-sampling error (house effects, likely-voter screens)
+
+# A last line without a newline is read once the file has been left alone this long (seconds)
+PARTIAL_LINE_GRACE = 1.0
+
+_normal = NormalDist()
+
+
+def parse_poll(record):
+    """
+    Turn a raw poll record (dict from CSV/JSON) into a clean poll dict.
+    Expected keys: state, harris, trump, sample_size and optionally date (YYYY-MM-DD).
+    Returns None for records that can't be used.
+    """
+    if not isinstance(record, dict) or not isinstance(record.get("state"), str):
+        return None
+    try:
+        harris = float(record["harris"])
+        trump = float(record["trump"])
+        sample_size = float(record["sample_size"])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+    if not all(math.isfinite(x) for x in (harris, trump, sample_size)):
+        return None
+    if harris < 0 or trump < 0 or harris + trump <= 0 or sample_size < 1:
+        return None
+    sample_size = int(sample_size)
+
+    date = record.get("date")
+    if date is None or date == "":
+        date = datetime.date.today()
+    elif isinstance(date, str):
+        try:
+            date = datetime.date.fromisoformat(date[:10])
+        except ValueError:
+            return None
+    elif not isinstance(date, datetime.date):
+        return None
+
+    return {
+        "state": record["state"].strip(),
+        "harris": harris,
+        "trump": trump,
+        "sample_size": sample_size,
+        "date": date,
+    }
+
+
+class PollSource:
+    """
+    Reads polls from a local file (.csv or .json/.jsonl) and/or a queue.
+    The file is followed like `tail -f`: each call to read_new() only returns
+    records appended since the previous call.
+    """
+
+    def __init__(self, path=None, poll_queue=None):
+        self.path = path
+        self.queue = poll_queue
+        self._offset = 0
+        self._header = None
+        self._last_size = None
+
+    def _read_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return []
+        stat = os.stat(self.path)
+        if stat.st_size < self._offset:
+            # File was truncated or replaced, start over
+            self._offset = 0
+            self._header = None
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        # Only consume complete lines, a writer may be mid-way through the last one.
+        # A final line without a newline is taken once the file stops changing.
+        settled = stat.st_size == self._last_size or time.time() - stat.st_mtime > PARTIAL_LINE_GRACE
+        self._last_size = stat.st_size
+        if not settled:
+            chunk = chunk[:chunk.rfind(b"\n") + 1]
+        self._offset += len(chunk)
+        lines = [line for line in chunk.decode("utf-8", errors="replace").splitlines() if line.strip()]
+
+        if self.path.endswith((".json", ".jsonl")):
+            records = []
+            for line in lines:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+            return records
+
+        if self._header is None and lines:
+            self._header = next(csv.reader([lines.pop(0)]))
+        return list(csv.DictReader(io.StringIO("\n".join(lines)), fieldnames=self._header))
+
+    def _read_queue(self):
+        records = []
+        if self.queue is None:
+            return records
+        while True:
+            try:
+                records.append(self.queue.get_nowait())
+            except queue.Empty:
+                return records
+
+    def read_new(self):
+        polls = [parse_poll(r) for r in self._read_file() + self._read_queue()]
+        return [p for p in polls if p is not None]
+
+
+class Nowcast:
+    """
+    Keeps a running estimate of Harris's two-party share (minus 50, in points)
+    for each state. Every poll is folded in with a single Kalman update, so the
+    cost of a new poll doesn't depend on how many polls came before it.
+    """
+
+    def __init__(self, priors, votes=None, votes_to_win=None, election_day_sd=ELECTION_DAY_SD):
+        # priors: {state: (mean, sd)}, election_day_sd: a single sd or {state: sd}
+        self.mean = {state: float(m) for state, (m, sd) in priors.items()}
+        self.var = {state: float(sd) ** 2 for state, (m, sd) in priors.items()}
+        if isinstance(election_day_sd, dict):
+            self.day_var = {state: float(election_day_sd[state]) ** 2 for state in priors}
+        else:
+            self.day_var = {state: float(election_day_sd) ** 2 for state in priors}
+        self.last_update = {state: None for state in priors}
+        self.votes = votes or {}
+        self.votes_to_win = votes_to_win
+        self.n_polls = 0
+        # Held while reading and applying polls, dashboards and the API share one nowcast
+        self.lock = threading.Lock()
+        self._probs = {state: self._state_prob(state) for state in priors}
+        # {poll date: Harris win probability (%) after that day's polls}
+        self.history = {}
+
+    @classmethod
+    def from_probabilities(cls, states, prior_sd=3.0):
+        """
+        Build a nowcast from the Election_2024 style state list, choosing prior
+        means so the starting win probabilities match each state's prob_harris.
+        """
+        scale = (prior_sd ** 2 + ELECTION_DAY_SD ** 2) ** 0.5
+        priors = {
+            s["name"]: (_normal.inv_cdf(min(max(s["prob_harris"], 0.001), 0.999)) * scale, prior_sd)
+            for s in states
+        }
+        votes = {s["name"]: s["votes"] for s in states}
+        total = sum(votes.values())
+        return cls(priors, votes, total // 2 + 1)
+
+    @classmethod
+    def from_margins(cls, margins):
+        """
+        Build a nowcast from the Dashboard_elections style {state: (dist, mean, sd)} table.
+        Each sd is total uncertainty, split evenly between what polls can resolve and
+        election-day error, so the table comes back unchanged until polls arrive.
+        """
+        priors = {state: (mean, sd / 2 ** 0.5) for state, (dist, mean, sd) in margins.items()}
+        day_sd = {state: sd / 2 ** 0.5 for state, (dist, mean, sd) in margins.items()}
+        return cls(priors, election_day_sd=day_sd)
+
+    def _state_prob(self, state):
+        return _normal.cdf(self.mean[state] / self.sd(state))
+
+    def update(self, poll):
+        """
+        Fold one poll into its state's estimate. Returns the state name, or None
+        if the poll is for a state we don't track.
+        """
+        state = poll["state"]
+        if state not in self.mean:
+            return None
+
+        # Time update: the race can drift between polls
+        last = self.last_update[state]
+        if last is not None:
+            days = (poll["date"] - last).days
+            if days > 0:
+                self.var[state] += DRIFT_PER_DAY * days
+        if last is None or poll["date"] > last:
+            self.last_update[state] = poll["date"]
+
+        # Measurement update
+        share = poll["harris"] / (poll["harris"] + poll["trump"])
+        observed = share * 100 - 50
+        noise = max(10000 * share * (1 - share) / poll["sample_size"], MIN_POLL_VARIANCE)
+        gain = self.var[state] / (self.var[state] + noise)
+        self.mean[state] += gain * (observed - self.mean[state])
+        self.var[state] *= 1 - gain
+
+        self.n_polls += 1
+        return state
+
+    def ingest(self, polls):
+        """
+        Apply a batch of polls in date order and refresh only the states they touched,
+        recording the win probability in the history after each poll date.
+        History is never rewritten: a poll older than the latest history point is
+        recorded at that point, since earlier points can't include later polls.
+        Returns the set of touched states.
+        """
+        by_date = {}
+        for poll in polls:
+            by_date.setdefault(poll["date"], []).append(poll)
+
+        touched = set()
+        for date in sorted(by_date):
+            day_touched = {self.update(p) for p in by_date[date]} - {None}
+            for state in day_touched:
+                self._probs[state] = self._state_prob(state)
+            if day_touched and self.votes:
+                self.history[max([date] + list(self.history))] = self.win_probability() * 100
+            touched |= day_touched
+        return touched
+
+    def prob(self, state):
+        return self._probs[state]
+
+    def sd(self, state):
+        """
+        Total uncertainty about the state's result: the estimate's own variance
+        plus election-day error.
+        """
+        return (self.var[state] + self.day_var[state]) ** 0.5
+
+    def history_series(self):
+        """
+        History as (date, Harris win probability %) pairs ordered by poll date.
+        Before any polls it holds a single point for today.
+        """
+        if not self.history:
+            return [(datetime.date.today(), self.win_probability() * 100)]
+        return sorted(self.history.items())
+
+    def margin_table(self):
+        """
+        Current estimates in the {state: ('normal', mean, sd)} shape used by Dashboard_elections.
+        """
+        return {state: ("normal", self.mean[state], self.sd(state)) for state in self.mean}
+
+    def win_probability(self, probs=None):
+        """
+        Exact probability that Harris reaches votes_to_win, treating states as
+        independent. Works on the electoral vote distribution instead of sampling.
+        """
+        probs = probs or self._probs
+        dist = [1.0]
+        for state, votes in self.votes.items():
+            p = probs[state]
+            new = [0.0] * (len(dist) + votes)
+            for ev, weight in enumerate(dist):
+                if weight:
+                    new[ev + votes] += weight * p
+                    new[ev] += weight * (1 - p)
+            dist = new
+        return sum(dist[self.votes_to_win:])
+
+
+def load_nowcast(nowcast, source):
+    """
+    Pull whatever is new from the source into the nowcast. Returns the touched states.
+    Safe to call from several threads at once.
+    """
+    with nowcast.lock:
+        return nowcast.ingest(source.read_new())
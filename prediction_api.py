@@ -0,0 +1,263 @@
+import json
+import math
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError
+
+import numpy as np
+from flask import Blueprint, Flask, jsonify, request
+
+import Election_2024
+import Dashboard_elections
+from prediction_model import predict_outcome
+from nowcast import load_nowcast
+
+BATCH_WINDOW = 0.005       # seconds to wait for more requests before running a batch
+MAX_BATCH_SIZE = 32
+MAX_SIMULATIONS = 80000
+MAX_MARGIN_SIMULATIONS = 10000    # same limit as the Dashboard_elections slider
+DEFAULT_SIMULATIONS = 10000
+SUBMIT_TIMEOUT = 30        # seconds a request waits for its batch before giving up
+
+
+class MicroBatcher:
+    """
+    Collects requests that arrive within `window` seconds of each other and
+    hands them to `batch_fn` as a single list. batch_fn must return one result
+    per request, in the same order.
+    """
+
+    def __init__(self, batch_fn, window=BATCH_WINDOW, max_batch_size=MAX_BATCH_SIZE):
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, payload, timeout=SUBMIT_TIMEOUT):
+        future = Future()
+        self._queue.put((payload, future))
+        return future.result(timeout=timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.batch_fn([payload for payload, future in batch])
+            except Exception as exc:
+                for payload, future in batch:
+                    future.set_exception(exc)
+                continue
+            results = list(results)
+            if len(results) != len(batch):
+                error = RuntimeError(f"batch returned {len(results)} results for {len(batch)} requests")
+                for payload, future in batch:
+                    future.set_exception(error)
+                continue
+            for (payload, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class ResponseCache:
+    """
+    Small thread-safe LRU cache of finished responses, keyed by endpoint and request body.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+def _finite(value, name):
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number")
+    return value
+
+
+def _n_simulations(payload, limit=MAX_SIMULATIONS):
+    n = int(_finite(payload.get("n_simulations", min(DEFAULT_SIMULATIONS, limit)), "n_simulations"))
+    if not 1 <= n <= limit:
+        raise ValueError(f"n_simulations must be between 1 and {limit}")
+    return n
+
+
+def _probabilities(payload):
+    names = {state["name"] for state in Election_2024.states}
+    probabilities = payload.get("probabilities", {})
+    if not isinstance(probabilities, dict):
+        raise ValueError("probabilities must be an object of state name to probability")
+    unknown = sorted(set(probabilities) - names)
+    if unknown:
+        raise ValueError(f"unknown states {unknown}, expected some of {sorted(names)}")
+    probabilities = {name: _finite(p, name) for name, p in probabilities.items()}
+    if not all(0 <= p <= 1 for p in probabilities.values()):
+        raise ValueError("probabilities must be between 0 and 1")
+    return probabilities
+
+
+# Batch functions: each turns a list of request payloads into a list of responses
+# with one vectorized call to the underlying simulation or model. New polls are
+# loaded by the routes before the cache lookup.
+
+def electoral_batch(payloads):
+    names = [state["name"] for state in Election_2024.states]
+    probabilities = np.array([
+        [p["probabilities"].get(name, Election_2024.nowcast.prob(name)) for name in names]
+        for p in payloads
+    ])
+    n_max = max(p["n_simulations"] for p in payloads)
+    harris_votes, swing_states_won, weights, groups = Election_2024.simulate_electoral_votes(probabilities, n_max)
+
+    results = []
+    for row, p in enumerate(payloads):
+        votes = harris_votes[row, :p["n_simulations"]]
+        prob_harris = float((votes >= Election_2024.votes_to_win).mean())
+        results.append({
+            "prob_harris": prob_harris,
+            "prob_trump": 1 - prob_harris,
+            "avg_harris_votes": float(votes.mean()),
+            "n_simulations": p["n_simulations"],
+            "probabilities": dict(zip(names, probabilities[row].tolist())),
+        })
+    return results
+
+
+def margin_batch(payloads):
+    df = Dashboard_elections.run_simulation(sum(p["n_simulations"] for p in payloads))
+
+    results = []
+    start = 0
+    for p in payloads:
+        part = df.iloc[start:start + p["n_simulations"]]
+        start += p["n_simulations"]
+        results.append({
+            "win_rate": float((part["margin"] > 0).mean()),
+            "avg_margin_pct": float(part["margin_pct"].mean()),
+            "margin_pct_95": [float(part["margin_pct"].quantile(0.025)), float(part["margin_pct"].quantile(0.975))],
+            "swing_state_win_rate": {
+                "Pennsylvania": float((part["PA_margin"] > 0).mean()),
+                "Georgia": float((part["GA_margin"] > 0).mean()),
+                "Michigan": float((part["MI_margin"] > 0).mean()),
+            },
+            "n_simulations": p["n_simulations"],
+        })
+    return results
+
+
+def prediction_batch(payloads):
+    features = {
+        name: np.array([p[name] for p in payloads])
+        for name in ("unemployment", "gdp", "approval", "ballot")
+    }
+    win_prob, margin = predict_outcome(**features)
+    return [
+        {"win_probability": float(w), "predicted_margin": float(m)}
+        for w, m in zip(win_prob, margin)
+    ]
+
+
+batchers = {
+    "electoral": MicroBatcher(electoral_batch),
+    "margin": MicroBatcher(margin_batch),
+    "predict": MicroBatcher(prediction_batch),
+}
+cache = ResponseCache()
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+
+def _payload():
+    payload = request.get_json(silent=True) or request.args.to_dict()
+    if not isinstance(payload, dict):
+        raise ValueError("request body must be a JSON object")
+    return payload
+
+
+def _respond(endpoint, payload, cache_key=None):
+    key = (endpoint, json.dumps(payload, sort_keys=True), cache_key)
+    result = cache.get(key)
+    if result is None:
+        try:
+            result = batchers[endpoint].submit(payload)
+        except TimeoutError:
+            return jsonify({"error": "timed out waiting for the batch"}), 503
+        cache.put(key, result)
+    return jsonify(result)
+
+
+@api.route("/simulate/electoral", methods=["GET", "POST"])
+def simulate_electoral():
+    try:
+        raw = _payload()
+        payload = {"probabilities": _probabilities(raw), "n_simulations": _n_simulations(raw)}
+    except (TypeError, ValueError, OverflowError) as exc:
+        return jsonify({"error": str(exc)}), 400
+    # Unspecified states come from the nowcast, so new polls invalidate cached answers
+    load_nowcast(Election_2024.nowcast, Election_2024.poll_source)
+    return _respond("electoral", payload, Election_2024.nowcast.n_polls)
+
+
+@api.route("/simulate/margin", methods=["GET", "POST"])
+def simulate_margin():
+    try:
+        payload = {"n_simulations": _n_simulations(_payload(), MAX_MARGIN_SIMULATIONS)}
+    except (TypeError, ValueError, OverflowError) as exc:
+        return jsonify({"error": str(exc)}), 400
+    load_nowcast(Dashboard_elections.nowcast, Dashboard_elections.poll_source)
+    return _respond("margin", payload, Dashboard_elections.nowcast.n_polls)
+
+
+@api.route("/predict", methods=["GET", "POST"])
+def predict():
+    try:
+        raw = _payload()
+        payload = {name: _finite(raw[name], name) for name in ("unemployment", "gdp", "approval", "ballot")}
+    except KeyError as exc:
+        return jsonify({"error": f"missing field {exc}"}), 400
+    except (TypeError, ValueError, OverflowError) as exc:
+        return jsonify({"error": str(exc)}), 400
+    return _respond("predict", payload)
+
+
+def register_api(server):
+    """
+    Mount the API on an existing Flask server, e.g. a dashboard's `app.server`.
+    """
+    server.register_blueprint(api)
+    return server
+
+
+if __name__ == '__main__':
+    register_api(Flask(__name__)).run(port=8051, threaded=True)
@@ -0,0 +1,12 @@
+import numpy as np
+
+
+# Win probability and margin for one or many sets of indicators (scalars or arrays)
+def predict_outcome(unemployment, gdp, approval, ballot):
+    # Calculate win probability (simplified example)
+    win_prob = 50 + (np.asarray(approval) - 50) * 0.5 + np.asarray(gdp) * 2 - (np.asarray(unemployment) - 5) * 3 + np.asarray(ballot) * 2
+    win_prob = np.clip(win_prob, 1, 99)
+    
+    # Calculate predicted margin
+    margin = (win_prob - 50) / 5
+    return win_prob, margin
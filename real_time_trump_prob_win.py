@@ -2,20 +2,22 @@ import dash
 from dash import html, dcc
 import plotly.graph_objects as go
 from dash.dependencies import Input, Output
-import datetime
 import numpy as np
+from Election_2024 import nowcast, poll_source
+from nowcast import load_nowcast
 
 # Initialize the Dash app
 app = dash.Dash(__name__)
 
-# Sample data - replace with your actual data source
-def generate_sample_data():
-    dates = [datetime.datetime.now() - datetime.timedelta(days=x) for x in range(30, 0, -1)]
-    # Sample probabilities - replace with your actual probability calculations
-    probabilities = np.clip(50 + np.cumsum(np.random.normal(0, 2, 30)), 0, 100)
+# Trump win probability after each poll date folded into the nowcast
+def get_history():
+    load_nowcast(nowcast, poll_source)
+    history = nowcast.history_series()
+    dates = [when for when, harris_prob in history]
+    probabilities = np.array([100 - harris_prob for when, harris_prob in history])
     return dates, probabilities
 
-dates, probabilities = generate_sample_data()
+dates, probabilities = get_history()
 
 app.layout = html.Div([
     html.H1("2024 Election Probability Tracker", 
@@ -72,8 +74,7 @@ app.layout = html.Div([
     [Input('interval-component', 'n_intervals')]
 )
 def update_metrics(n):
-    # Replace this with your actual data update logic
-    dates, probabilities = generate_sample_data()
+    dates, probabilities = get_history()
     
     new_figure = {
         'data': [
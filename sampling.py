@@ -0,0 +1,115 @@
+import warnings
+
+import numpy as np
+from scipy.special import expit, logit, ndtri
+from scipy.stats import qmc
+
+# Sampling strategies the simulators understand
+METHODS = ["plain", "antithetic", "stratified", "sobol", "halton", "importance"]
+
+# Independent randomizations used to get a standard error for stratified and quasi-random draws.
+# The standard error has N_REPLICATES - 1 degrees of freedom, so the effective sample size
+# reported for these methods is only approximate.
+N_REPLICATES = 32
+
+
+def draw_uniforms(n_simulations, dims, method="plain", strata_dim=0):
+    """
+    Uniform(0, 1) draws shaped (n_simulations, dims), plus a group label per draw.
+    Draws with different labels are independent of each other, which is what
+    estimate() needs to compute an honest standard error:
+      plain / importance - every draw is its own group (the tilt is applied by the simulator)
+      antithetic         - u and 1 - u form a pair
+      stratified         - one stratum per draw on column strata_dim, repeated N_REPLICATES times
+      sobol / halton     - scrambled low-discrepancy sequence, repeated N_REPLICATES times
+    """
+    if method in ("plain", "importance"):
+        return np.random.rand(n_simulations, dims), np.arange(n_simulations)
+
+    if method == "antithetic":
+        half = np.random.rand((n_simulations + 1) // 2, dims)
+        u = np.stack([half, 1 - half], axis=1).reshape(-1, dims)[:n_simulations]
+        return u, np.arange(n_simulations) // 2
+
+    if method not in ("stratified", "sobol", "halton"):
+        raise ValueError(f"Unknown sampling method {method!r}, expected one of {METHODS}")
+
+    chunks = []
+    for size in (len(c) for c in np.array_split(np.arange(n_simulations), N_REPLICATES)):
+        if size == 0:
+            continue
+        if method == "stratified":
+            u = np.random.rand(size, dims)
+            u[:, strata_dim] = (np.random.permutation(size) + u[:, strata_dim]) / size
+        else:
+            engine = qmc.Sobol(dims, scramble=True) if method == "sobol" else qmc.Halton(dims, scramble=True)
+            with warnings.catch_warnings():
+                # Sobol prefers powers of two; any prefix of the sequence is still valid
+                warnings.simplefilter("ignore", UserWarning)
+                u = engine.random(size)
+        chunks.append(u)
+    groups = np.concatenate([np.full(len(u), i) for i, u in enumerate(chunks)])
+    return np.concatenate(chunks), groups
+
+
+def draw_normals(n_simulations, dims, method="plain"):
+    """
+    Standard normal draws from draw_uniforms via the inverse CDF.
+    """
+    u, groups = draw_uniforms(n_simulations, dims, method)
+    return ndtri(np.clip(u, 1e-12, 1 - 1e-12)), groups
+
+
+def tilted_bernoulli(u, p, tilt):
+    """
+    Bernoulli(p) outcomes sampled with log-odds shifted by `tilt`, so rare outcomes
+    show up more often. Returns the outcomes and likelihood ratio weights (product over
+    the last axis) that make weighted averages unbiased for the untilted probabilities.
+    """
+    p = np.asarray(p, dtype=float)
+    q = expit(logit(np.clip(p, 1e-9, 1 - 1e-9)) + tilt)
+    outcome = u < q
+    weights = np.prod(np.where(outcome, p / q, (1 - p) / (1 - q)), axis=-1)
+    return outcome, weights
+
+
+def shifted_normal(z, shift):
+    """
+    Standard normal draws moved by `shift`, with likelihood ratio weights back to N(0, 1).
+    """
+    x = z + shift
+    return x, np.exp(-shift * x + shift ** 2 / 2)
+
+
+def estimate(values, groups, weights=None):
+    """
+    Mean of `values` with its standard error and effective sample size.
+    The effective sample size is the number of plain Monte Carlo draws that would
+    give the same standard error, or None when the standard error is zero or unknown.
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.ones_like(values) if weights is None else np.asarray(weights, dtype=float)
+    weighted = values * weights
+    mean = weighted.mean()
+
+    _, inverse, counts = np.unique(groups, return_inverse=True, return_counts=True)
+    group_means = np.bincount(inverse, weighted) / counts
+    if len(group_means) > 1:
+        std_error = group_means.std(ddof=1) / np.sqrt(len(group_means))
+    else:
+        std_error = np.nan
+
+    variance = (weights * (values - mean) ** 2).mean()
+    ess = float(variance / std_error ** 2) if std_error > 0 else None
+    return {"mean": float(mean), "std_error": float(std_error), "ess": ess, "n_draws": len(values)}
+
+
+def weighted_quantile(values, q, weights=None):
+    """
+    Quantile of `values` when each draw carries an importance weight.
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.ones_like(values) if weights is None else np.asarray(weights, dtype=float)
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order])
+    return float(np.interp(q, cumulative / cumulative[-1], values[order]))
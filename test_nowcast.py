@@ -0,0 +1,102 @@
+import datetime
+import math
+import os
+import time
+
+import pytest
+
+from nowcast import MIN_POLL_VARIANCE, Nowcast, PollSource, load_nowcast, parse_poll
+
+STATES = [
+    {"name": "Texas", "votes": 38, "prob_harris": 0.45},
+    {"name": "Ohio", "votes": 18, "prob_harris": 0.50},
+]
+
+
+def poll(state="Texas", harris=48, trump=48, sample_size=1000, date="2024-10-01"):
+    return {"state": state, "harris": harris, "trump": trump, "sample_size": sample_size, "date": date}
+
+
+def test_parse_poll_accepts_clean_record():
+    parsed = parse_poll(poll(sample_size="800"))
+    assert parsed["state"] == "Texas"
+    assert parsed["sample_size"] == 800
+    assert parsed["date"] == datetime.date(2024, 10, 1)
+
+
+@pytest.mark.parametrize("record", [
+    poll(date="10/02/2024"),
+    poll(state=None),
+    poll(sample_size="inf"),
+    poll(sample_size=0),
+    poll(harris="nan"),
+    poll(harris=float("inf")),
+    poll(harris=-40),
+    poll(trump=-1),
+    poll(harris=0, trump=0),
+    {"state": "Texas"},
+    [1],
+])
+def test_parse_poll_rejects_malformed_record(record):
+    assert parse_poll(record) is None
+
+
+def test_update_is_a_kalman_step():
+    nowcast = Nowcast({"Texas": (0.0, 2.0)})
+    nowcast.update(parse_poll(poll(harris=52, trump=48, sample_size=100000)))
+
+    # Sampling noise is below the floor, so the poll counts with MIN_POLL_VARIANCE
+    gain = 4.0 / (4.0 + MIN_POLL_VARIANCE)
+    assert nowcast.mean["Texas"] == pytest.approx(gain * 2.0)
+    assert nowcast.var["Texas"] == pytest.approx(4.0 * (1 - gain))
+
+
+def test_update_ignores_untracked_state():
+    nowcast = Nowcast.from_probabilities(STATES)
+    assert nowcast.update(parse_poll(poll(state="Narnia"))) is None
+    assert nowcast.n_polls == 0
+
+
+def test_ingest_keeps_history_in_date_order_and_never_backfills():
+    nowcast = Nowcast.from_probabilities(STATES)
+    nowcast.ingest([parse_poll(poll(harris=55, trump=41, date="2024-10-10")),
+                    parse_poll(poll(state="Ohio", date="2024-10-05"))])
+    assert [d for d, p in nowcast.history_series()] == [datetime.date(2024, 10, 5), datetime.date(2024, 10, 10)]
+    early = nowcast.history[datetime.date(2024, 10, 5)]
+
+    # A late-arriving older poll lands on the latest point instead of rewriting the past
+    touched = nowcast.ingest([parse_poll(poll(harris=60, trump=36, date="2024-10-01"))])
+    assert touched == {"Texas"}
+    assert datetime.date(2024, 10, 1) not in nowcast.history
+    assert nowcast.history[datetime.date(2024, 10, 5)] == early
+    assert nowcast.history[datetime.date(2024, 10, 10)] == pytest.approx(nowcast.win_probability() * 100)
+
+
+def test_margin_table_matches_prior_until_polls_arrive():
+    nowcast = Nowcast.from_margins({"Pennsylvania": ("normal", 1.2, 0.8)})
+    dist, mean, sd = nowcast.margin_table()["Pennsylvania"]
+    assert (mean, sd) == pytest.approx((1.2, 0.8))
+
+
+def test_poll_source_survives_bad_rows_and_reads_unterminated_last_line(tmp_path):
+    path = tmp_path / "polls.csv"
+    path.write_text("state,harris,trump,sample_size,date\n"
+                    "Texas,46,50,800,2024-10-01\n"
+                    "Texas,46,50,800,10/02/2024\n"
+                    "Ohio,48,48,inf,2024-10-01\n"
+                    "Ohio,49,47,600,2024-10-03", encoding="utf-8")
+    old = time.time() - 60
+    os.utime(path, (old, old))
+
+    nowcast = Nowcast.from_probabilities(STATES)
+    assert load_nowcast(nowcast, PollSource(str(path))) == {"Texas", "Ohio"}
+    assert nowcast.n_polls == 2
+    assert all(math.isfinite(p) for d, p in nowcast.history_series())
+
+
+def test_poll_source_skips_bad_json_lines(tmp_path):
+    path = tmp_path / "polls.jsonl"
+    path.write_text('{"state": "Texas", "harris": 47, "trump": 49, "sample_size": 900}\n'
+                    '{bad\n'
+                    '{"state": null, "harris": 1, "trump": 1, "sample_size": 5}\n', encoding="utf-8")
+    assert len(PollSource(str(path)).read_new()) == 1
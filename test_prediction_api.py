@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+from flask import Flask
+
+import prediction_api
+from prediction_api import MicroBatcher, register_api
+
+
+@pytest.fixture(scope="module")
+def client():
+    return register_api(Flask(__name__)).test_client()
+
+
+@pytest.mark.parametrize("url, body", [
+    ("/api/simulate/margin", "[1]"),
+    ("/api/simulate/margin", '{"n_simulations": Infinity}'),
+    ("/api/simulate/margin", '{"n_simulations": 20000}'),
+    ("/api/simulate/electoral", '{"n_simulations": 1e400}'),
+    ("/api/simulate/electoral", '{"probabilities": {"Texas": 7}}'),
+    ("/api/simulate/electoral", '{"probabilities": {"Texas": NaN}}'),
+    ("/api/simulate/electoral", '{"probabilities": {"Narnia": 0.5}}'),
+    ("/api/simulate/electoral", '{"probabilities": [0.5]}'),
+    ("/api/predict", '{"unemployment": 5, "gdp": 2, "approval": 45}'),
+    ("/api/predict", '{"unemployment": "nan", "gdp": 2, "approval": 45, "ballot": 0}'),
+    ("/api/predict", '{"unemployment": 5, "gdp": Infinity, "approval": 45, "ballot": 0}'),
+])
+def test_bad_requests_return_400(client, url, body):
+    response = client.post(url, data=body, content_type="application/json")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_endpoints_return_results(client):
+    electoral = client.post("/api/simulate/electoral", json={"probabilities": {"Texas": 1.0}, "n_simulations": 500})
+    assert electoral.status_code == 200
+    assert electoral.get_json()["probabilities"]["Texas"] == 1.0
+
+    margin = client.post("/api/simulate/margin", json={"n_simulations": 200})
+    assert 0 <= margin.get_json()["win_rate"] <= 1
+
+    predicted = client.post("/api/predict", json={"unemployment": 5, "gdp": 0, "approval": 50, "ballot": 0})
+    assert predicted.get_json() == {"win_probability": 50.0, "predicted_margin": 0.0}
+
+
+def test_concurrent_requests_each_get_their_own_result(client):
+    results = {}
+
+    def request(i):
+        response = client.post("/api/predict", json={"unemployment": 5, "gdp": i / 10, "approval": 50, "ballot": 0})
+        results[i] = response.get_json()["win_probability"]
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {i: pytest.approx(50 + i / 5) for i in range(40)}
+
+
+def test_batcher_collects_concurrent_submits():
+    sizes = []
+
+    def double(payloads):
+        sizes.append(len(payloads))
+        return [p * 2 for p in payloads]
+
+    batcher = MicroBatcher(double, window=0.05)
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.update({i: batcher.submit(i)})) for i in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {i: i * 2 for i in range(10)}
+    assert len(sizes) < 10
+
+
+def test_batcher_fails_every_request_when_results_are_missing():
+    batcher = MicroBatcher(lambda payloads: payloads[:-1], window=0.05)
+    errors = []
+
+    def submit(i):
+        try:
+            batcher.submit(i, timeout=5)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(errors) == 3
+
+
+def test_cached_results_follow_new_polls(client, tmp_path, monkeypatch):
+    source = prediction_api.Election_2024.poll_source
+    path = tmp_path / "polls.csv"
+    monkeypatch.setattr(source, "path", str(path))
+    body = {"n_simulations": 100}
+    before = client.post("/api/simulate/electoral", json=body).get_json()["probabilities"]["California"]
+
+    path.write_text("state,harris,trump,sample_size,date\n" + "California,40,58,1000,2024-10-01\n" * 5)
+    after = client.post("/api/simulate/electoral", json=body).get_json()["probabilities"]["California"]
+    assert after < before
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from sampling import (METHODS, N_REPLICATES, draw_uniforms, estimate, shifted_normal,
+                      tilted_bernoulli, weighted_quantile)
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_draw_uniforms_shape_and_range(method):
+    u, groups = draw_uniforms(1001, 4, method)
+    assert u.shape == (1001, 4)
+    assert len(groups) == 1001
+    assert ((u >= 0) & (u <= 1)).all()
+
+
+def test_draw_uniforms_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        draw_uniforms(10, 2, "magic")
+
+
+def test_stratified_puts_one_draw_in_each_stratum_of_the_chosen_column():
+    u, groups = draw_uniforms(N_REPLICATES * 50, 3, "stratified", strata_dim=1)
+    for g in range(N_REPLICATES):
+        column = u[groups == g, 1]
+        assert sorted((column * 50).astype(int)) == list(range(50))
+
+
+def test_estimate_plain_matches_binomial_standard_error():
+    np.random.seed(0)
+    u, groups = draw_uniforms(20000, 1, "plain")
+    est = estimate(u[:, 0] < 0.3, groups)
+    assert est["mean"] == pytest.approx(0.3, abs=0.02)
+    assert est["std_error"] == pytest.approx(np.sqrt(0.3 * 0.7 / 20000), rel=0.05)
+    assert est["ess"] == pytest.approx(20000, rel=0.01)
+
+
+def test_estimate_antithetic_linear_value_has_no_error():
+    u, groups = draw_uniforms(1000, 1, "antithetic")
+    est = estimate(u[:, 0], groups)
+    assert est["mean"] == pytest.approx(0.5)
+    assert est["std_error"] == pytest.approx(0, abs=1e-12)
+    assert est["ess"] is None
+
+
+def test_estimate_antithetic_groups_pairs():
+    u, groups = draw_uniforms(10, 2, "antithetic")
+    assert list(groups) == [0, 0, 1, 1, 2, 2, 3, 3, 4, 4]
+    np.testing.assert_allclose(u[0::2] + u[1::2], 1)
+
+
+def test_importance_weights_are_unbiased():
+    np.random.seed(1)
+    p = np.array([0.3, 0.6])
+    u, groups = draw_uniforms(50000, 2, "importance")
+    outcome, weights = tilted_bernoulli(u, p, 1.0)
+    est = estimate(outcome.all(axis=1), groups, weights)
+    assert est["mean"] == pytest.approx(0.18, abs=3 * est["std_error"])
+
+    x, weights = shifted_normal(np.random.randn(50000), 2.0)
+    assert np.mean(weights * (x > 2)) == pytest.approx(0.02275, rel=0.05)
+
+
+def test_weighted_quantile_without_weights():
+    assert weighted_quantile(np.arange(101), 0.5) == pytest.approx(50, abs=1)